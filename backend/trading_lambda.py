@@ -1,17 +1,95 @@
+import base64
 import json
+import random
+import re
 import boto3
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
-# Initialize S3 client
-s3 = boto3.client("s3")
+try:
+    import orjson
+except ImportError:  # Optional - only present when bundled into the deployment zip
+    orjson = None
+
+# Initialize S3 client - created once per container so warm invocations reuse
+# its pooled keep-alive connections. Short timeouts let a stalled request fail
+# into botocore's retries instead of running out the Lambda timeout
+s3 = boto3.client(
+    "s3",
+    config=Config(
+        connect_timeout=2,
+        read_timeout=5,
+        tcp_keepalive=True,
+        retries={"mode": "standard", "max_attempts": 3},
+    ),
+)
+
+# Conditional PUTs go through a client that never retries on its own: a PUT
+# applied just before a timeout would otherwise be resent, fail its own
+# precondition, and be mistaken for a concurrent write. The default read
+# timeout makes such an ambiguous failure rare; the callers' reload-and-retry
+# loops handle real conflicts
+s3_conditional = boto3.client(
+    "s3",
+    config=Config(
+        connect_timeout=2,
+        tcp_keepalive=True,
+        retries={"mode": "standard", "max_attempts": 0},
+    ),
+)
 
 # Configuration - updated with actual bucket name
 BUCKET_NAME = "children-of-singularity-releases"
-LISTINGS_KEY = "trading/listings.json"
-TRADES_KEY = "trading/completed_trades.json"
+LISTINGS_KEY = "trading/listings.json"  # Active listings only
+ARCHIVE_KEY_TEMPLATE = "trading/archive/{listing_id}.json"  # Sold and removed listings
+HISTORY_KEY_TEMPLATE = "trading/history/{player_id}.json"  # Per-player trades
+TRADES_KEY = "trading/completed_trades.json"  # Legacy global trade log, read-only
+
+# Fields a client must supply when creating a listing
+REQUIRED_LISTING_FIELDS = frozenset(
+    {"seller_id", "seller_name", "item_type", "item_name", "quantity", "asking_price"}
+)
+
+# Listing IDs embedded in request paths, for events without pathParameters
+BUY_PATH_PATTERN = re.compile(r"/([\w\-]+)/buy")
+LISTING_PATH_PATTERN = re.compile(r"/listings/([\w\-]+)")
+
+# Routes with fixed paths, dispatched directly on (method, path)
+EXACT_ROUTES = {
+    ("GET", "/listings"): lambda event: get_active_listings(
+        get_header(event, "If-None-Match")
+    ),
+    ("POST", "/listings"): lambda event: create_listing(
+        decode_json(event.get("body", "{}"))
+    ),
+}
+
+# Worker threads for independent S3 requests, reused across warm invocations
+_s3_executor = ThreadPoolExecutor(max_workers=4)
+
+# Full-jitter exponential backoff between optimistic-locking retries
+MAX_WRITE_ATTEMPTS = 5
+RETRY_BASE_DELAY_SECONDS = 0.02
+RETRY_MAX_DELAY_SECONDS = 0.5
+
+# How long read-only endpoints may serve a cached copy without asking S3
+READ_CACHE_TTL_SECONDS = 5.0
+
+# Parsed S3 objects reused across warm invocations, least recently used first:
+# key -> (etag or None if missing, records, monotonic time S3 last confirmed them)
+# Guarded by a lock because _s3_executor threads read and write it concurrently
+S3_CACHE_MAX_ENTRIES = 256
+_s3_cache: OrderedDict[str, tuple[Optional[str], List[Dict[str, Any]], float]] = (
+    OrderedDict()
+)
+_s3_cache_lock = threading.Lock()
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -27,40 +105,30 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         path_parameters = event.get("pathParameters") or {}
 
         print(f"Processing {method} {path}")
-        print(f"Path parameters: {path_parameters}")
-        print(
-            f"Event debug: method={method}, path={path}, resource={event.get('resource', 'N/A')}"
-        )
 
-        # Route requests
-        if method == "GET" and path == "/listings":
-            return get_active_listings()
-        elif method == "POST" and path == "/listings":
-            body = json.loads(event.get("body", "{}"))
-            return create_listing(body)
+        # Route requests - fixed paths by table lookup, then parameterized paths
+        route = EXACT_ROUTES.get((method, path))
+        if route:
+            return route(event)
         elif method == "POST" and "/buy" in path:
             # Handle both /buy/{listing_id} and /listings/{listing_id}/buy patterns
             listing_id = path_parameters.get("listing_id") or path_parameters.get("id")
             if not listing_id:
                 # Try to extract from path
-                import re
-
-                match = re.search(r"/([\w\-]+)/buy", path)
+                match = BUY_PATH_PATTERN.search(path)
                 if match:
                     listing_id = match.group(1)
-            body = json.loads(event.get("body", "{}"))
+            body = decode_json(event.get("body", "{}"))
             return buy_listing(listing_id, body)
         elif method == "DELETE" and path.startswith("/listings/"):
             # Handle DELETE /listings/{listing_id}
             listing_id = path_parameters.get("listing_id") or path_parameters.get("id")
             if not listing_id:
                 # Try to extract from path
-                import re
-
-                match = re.search(r"/listings/([\w\-]+)", path)
+                match = LISTING_PATH_PATTERN.search(path)
                 if match:
                     listing_id = match.group(1)
-            body = json.loads(event.get("body", "{}"))
+            body = decode_json(event.get("body", "{}"))
             return delete_listing(listing_id, body)
         elif method == "GET" and path.startswith("/history/"):
             player_id = path_parameters.get("player_id")
@@ -73,21 +141,33 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return create_response(500, {"error": "Internal server error"})
 
 
-def get_active_listings() -> Dict[str, Any]:
-    """Get all active trading listings"""
+def get_active_listings(if_none_match: Optional[str] = None) -> Dict[str, Any]:
+    """Get all active trading listings, or 304 if the client's copy is current"""
     try:
-        listings = load_from_s3(LISTINGS_KEY)[0]  # Only data, ignore ETag for reads
-
-        # Filter only active listings
+        listings, etag = load_from_s3(LISTINGS_KEY, max_age=READ_CACHE_TTL_SECONDS)
+
+        # The listings object's ETag versions the response, so a polling
+        # client that already holds it skips the filter, sort and body
+        etag_headers = {"ETag": f'"{etag}"'} if etag else None
+        if etag and if_none_match:
+            client_etags = {
+                tag.strip().removeprefix("W/").strip('"')
+                for tag in if_none_match.split(",")
+            }
+            if etag in client_etags or "*" in client_etags:
+                return create_response(304, None, etag_headers)
+
+        # Filter only active listings (stored newest first; files written by
+        # earlier versions are oldest first until their next write)
+        ensure_listings_newest_first(listings)
         active_listings = [
             listing for listing in listings if listing.get("status") == "active"
         ]
 
-        # Sort by creation date (newest first)
-        active_listings.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-
         return create_response(
-            200, {"listings": active_listings, "total": len(active_listings)}
+            200,
+            {"listings": active_listings, "total": len(active_listings)},
+            etag_headers,
         )
 
     except Exception as e:
@@ -98,85 +178,39 @@ def get_active_listings() -> Dict[str, Any]:
 def create_listing(listing_data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new trading listing"""
     try:
-        # Validate required fields
-        required_fields = [
-            "seller_id",
-            "seller_name",
-            "item_type",
-            "item_name",
-            "quantity",
-            "asking_price",
-        ]
-
-        for field in required_fields:
-            if field not in listing_data:
-                return create_response(400, {"error": f"Missing field: {field}"})
+        # Validate required fields (a non-object body is missing all of them)
+        if not isinstance(listing_data, dict):
+            return create_response(400, {"error": "Missing field: seller_id"})
+        missing_fields = REQUIRED_LISTING_FIELDS - listing_data.keys()
+        if missing_fields:
+            return create_response(
+                400, {"error": f"Missing field: {', '.join(sorted(missing_fields))}"}
+            )
 
-        # Validate data types and values
-        if (
-            not isinstance(listing_data.get("quantity"), int)
-            or listing_data["quantity"] <= 0
-        ):
+        # Validate data types and values (bool is an int subclass, so compare types)
+        quantity = listing_data["quantity"]
+        if type(quantity) is not int or quantity <= 0:
             return create_response(
                 400, {"error": "Quantity must be a positive integer"}
             )
 
-        if (
-            not isinstance(listing_data.get("asking_price"), int)
-            or listing_data["asking_price"] <= 0
-        ):
+        asking_price = listing_data["asking_price"]
+        if type(asking_price) is not int or asking_price <= 0:
             return create_response(
                 400, {"error": "Asking price must be a positive integer"}
             )
 
-        # SERVER-SIDE INVENTORY VALIDATION: Prevent over-listing
-        # Check seller's existing active listings for this item type
-        current_listings, _ = load_from_s3(LISTINGS_KEY)
         seller_id = listing_data["seller_id"]
         item_type = listing_data["item_type"]
         quantity_to_list = listing_data["quantity"]
 
-        # Calculate total quantity already listed by this seller for this item type
-        existing_quantity = 0
-        for existing_listing in current_listings:
-            if (
-                existing_listing.get("seller_id") == seller_id
-                and existing_listing.get("item_type") == item_type
-                and existing_listing.get("status") == "active"
-            ):
-                existing_quantity += existing_listing.get("quantity", 0)
-
         # Basic business logic: Limit total listings per item type per player
         # This is a server-side safety check - clients should do their own validation
         MAX_LISTED_QUANTITY_PER_ITEM = 50  # Conservative limit
-        total_after_listing = existing_quantity + quantity_to_list
-
-        if total_after_listing > MAX_LISTED_QUANTITY_PER_ITEM:
-            return create_response(
-                400,
-                {
-                    "error": (
-                        f"Server validation failed: Cannot list {quantity_to_list} "
-                        f"{item_type} - would exceed maximum. Already have "
-                        f"{existing_quantity} listed (max {MAX_LISTED_QUANTITY_PER_ITEM} "
-                        "per item type)"
-                    ),
-                    "existing_quantity": existing_quantity,
-                    "requested_quantity": quantity_to_list,
-                    "max_allowed": MAX_LISTED_QUANTITY_PER_ITEM,
-                },
-            )
-
-        # Comprehensive logging for inventory validation
-        print(f"[INVENTORY_VALIDATION] Seller: {seller_id}")
-        print(f"[INVENTORY_VALIDATION] Item: {item_type} x{quantity_to_list}")
-        print(f"[INVENTORY_VALIDATION] Existing listings: {existing_quantity}")
-        print(f"[INVENTORY_VALIDATION] Total after listing: {total_after_listing}")
-        print("[INVENTORY_VALIDATION] Server validation passed - within limits")
 
         # Create listing object
         listing = {
-            "listing_id": str(uuid.uuid4()),
+            "listing_id": new_id(),
             "seller_id": listing_data["seller_id"],
             "seller_name": listing_data["seller_name"],
             "item_type": listing_data["item_type"],
@@ -188,12 +222,53 @@ def create_listing(listing_data: Dict[str, Any]) -> Dict[str, Any]:
             "created_at": datetime.now(timezone.utc).isoformat(),
         }
 
-        # Add to listings with retry on concurrent writes
-        max_retries = 3
+        # Validate and append against the same snapshot so each attempt is a
+        # single GET + conditional PUT; a concurrent write forces a reload and
+        # re-validation against the fresh listings
+        max_retries = MAX_WRITE_ATTEMPTS
         for attempt in range(max_retries):
             try:
                 listings, etag = load_from_s3(LISTINGS_KEY)
-                listings.append(listing)
+
+                # A failed attempt may still have been applied by S3
+                if attempt > 0 and any(
+                    existing["listing_id"] == listing["listing_id"]
+                    for existing in listings
+                ):
+                    break
+
+                # SERVER-SIDE INVENTORY VALIDATION: Prevent over-listing
+                existing_quantity = get_listed_quantity(listings, seller_id, item_type)
+                total_after_listing = existing_quantity + quantity_to_list
+
+                if total_after_listing > MAX_LISTED_QUANTITY_PER_ITEM:
+                    return create_response(
+                        400,
+                        {
+                            "error": (
+                                f"Server validation failed: Cannot list "
+                                f"{quantity_to_list} {item_type} - would exceed "
+                                f"maximum. Already have {existing_quantity} listed "
+                                f"(max {MAX_LISTED_QUANTITY_PER_ITEM} per item type)"
+                            ),
+                            "existing_quantity": existing_quantity,
+                            "requested_quantity": quantity_to_list,
+                            "max_allowed": MAX_LISTED_QUANTITY_PER_ITEM,
+                        },
+                    )
+
+                # Comprehensive logging for inventory validation
+                print(f"[INVENTORY_VALIDATION] Seller: {seller_id}")
+                print(f"[INVENTORY_VALIDATION] Item: {item_type} x{quantity_to_list}")
+                print(f"[INVENTORY_VALIDATION] Existing listings: {existing_quantity}")
+                print(
+                    f"[INVENTORY_VALIDATION] Total after listing: {total_after_listing}"
+                )
+                print("[INVENTORY_VALIDATION] Server validation passed - within limits")
+
+                # Stored newest first, so reads never need to sort
+                ensure_listings_newest_first(listings)
+                listings.insert(0, listing)
                 save_to_s3_with_etag(LISTINGS_KEY, listings, etag)
                 break
             except ClientError as e:
@@ -202,6 +277,7 @@ def create_listing(listing_data: Dict[str, Any]) -> Dict[str, Any]:
                     and attempt < max_retries - 1
                 ):
                     print(f"Concurrent write detected, retrying attempt {attempt + 1}")
+                    backoff(attempt)
                     continue
                 else:
                     raise e
@@ -218,6 +294,19 @@ def create_listing(listing_data: Dict[str, Any]) -> Dict[str, Any]:
         return create_response(500, {"error": "Failed to create listing"})
 
 
+def get_listed_quantity(
+    listings: List[Dict[str, Any]], seller_id: str, item_type: str
+) -> int:
+    """Total quantity a seller currently has listed for an item type"""
+    return sum(
+        listing.get("quantity", 0)
+        for listing in listings
+        if listing.get("seller_id") == seller_id
+        and listing.get("item_type") == item_type
+        and listing.get("status") == "active"
+    )
+
+
 def buy_listing(listing_id: str, buyer_data: Dict[str, Any]) -> Dict[str, Any]:
     """Purchase a trading listing with concurrency protection"""
     try:
@@ -228,25 +317,23 @@ def buy_listing(listing_id: str, buyer_data: Dict[str, Any]) -> Dict[str, Any]:
         if "buyer_id" not in buyer_data or "buyer_name" not in buyer_data:
             return create_response(400, {"error": "Missing buyer_id or buyer_name"})
 
+        # Reject self-purchases the client already told us about before reading
+        # S3; the stored seller_id is still checked below
+        if buyer_data.get("seller_id") == buyer_data["buyer_id"]:
+            return create_response(400, {"error": "Cannot buy your own listing"})
+
         # Implement optimistic locking with retries
-        max_retries = 3
+        max_retries = MAX_WRITE_ATTEMPTS
         for attempt in range(max_retries):
             try:
                 # Load current listings with ETag
                 listings, etag = load_from_s3(LISTINGS_KEY)
 
                 # Find the listing
-                listing_index = None
-                target_listing = None
-
-                for i, listing in enumerate(listings):
-                    if (
-                        listing["listing_id"] == listing_id
-                        and listing["status"] == "active"
-                    ):
-                        listing_index = i
-                        target_listing = listing
-                        break
+                listing_index = find_active_listing(listings, listing_id)
+                target_listing = (
+                    listings[listing_index] if listing_index is not None else None
+                )
 
                 if not target_listing:
                     return create_response(
@@ -273,12 +360,19 @@ def buy_listing(listing_id: str, buyer_data: Dict[str, Any]) -> Dict[str, Any]:
                         )
 
                 # Mark listing as sold
-                listings[listing_index]["status"] = "sold"
-                listings[listing_index]["buyer_id"] = buyer_data["buyer_id"]
-                listings[listing_index]["buyer_name"] = buyer_data["buyer_name"]
-                listings[listing_index]["sold_at"] = datetime.now(
-                    timezone.utc
-                ).isoformat()
+                sold_at = datetime.now(timezone.utc).isoformat()
+                listings[listing_index].update(
+                    {
+                        "status": "sold",
+                        "buyer_id": buyer_data["buyer_id"],
+                        "buyer_name": buyer_data["buyer_name"],
+                        "sold_at": sold_at,
+                    }
+                )
+
+                # Move it (and any other inactive entries) out of the active file
+                ensure_listings_newest_first(listings)
+                listings, archived = split_inactive_listings(listings)
 
                 # Save updated listings with ETag check (atomic operation)
                 save_to_s3_with_etag(LISTINGS_KEY, listings, etag)
@@ -293,6 +387,7 @@ def buy_listing(listing_id: str, buyer_data: Dict[str, Any]) -> Dict[str, Any]:
                             f"Concurrent purchase detected, "
                             f"retrying attempt {attempt + 1}"
                         )
+                        backoff(attempt)
                         continue
                     else:
                         return create_response(
@@ -303,7 +398,7 @@ def buy_listing(listing_id: str, buyer_data: Dict[str, Any]) -> Dict[str, Any]:
 
         # Create completed trade record
         trade_record = {
-            "trade_id": str(uuid.uuid4()),
+            "trade_id": new_id(),
             "listing_id": listing_id,
             "seller_id": target_listing["seller_id"],
             "seller_name": target_listing["seller_name"],
@@ -313,28 +408,23 @@ def buy_listing(listing_id: str, buyer_data: Dict[str, Any]) -> Dict[str, Any]:
             "item_name": target_listing["item_name"],
             "quantity": target_listing["quantity"],
             "final_price": target_listing["asking_price"],
-            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": sold_at,  # Same instant the listing was marked sold
         }
 
-        # Save trade record (with retry for concurrent writes)
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                trades, trades_etag = load_from_s3(TRADES_KEY)
-                trades.append(trade_record)
-                save_to_s3_with_etag(TRADES_KEY, trades, trades_etag)
-                break
-            except ClientError as e:
-                if (
-                    e.response["Error"]["Code"] == "PreconditionFailed"
-                    and attempt < max_retries - 1
-                ):
-                    print(f"Concurrent trade logging, retrying attempt {attempt + 1}")
-                    continue
-                else:
-                    # Trade completed but logging failed - not critical
-                    print(f"Warning: Trade completed but logging failed: {str(e)}")
-                    break
+        # Trade completed - logging failures are not critical. The two
+        # histories are separate keys, so update them in parallel. The sold
+        # listing itself is recorded by its trade, so only inactive entries
+        # left over from before the active/archive split are archived here
+        stale_listings = [
+            listing for listing in archived if listing["listing_id"] != listing_id
+        ]
+        seller_write = _s3_executor.submit(
+            prepend_to_s3, history_key(trade_record["seller_id"]), [trade_record]
+        )
+        prepend_to_s3(history_key(trade_record["buyer_id"]), [trade_record])
+        if stale_listings:
+            archive_listings(stale_listings)
+        seller_write.result()
 
         print(
             f"Completed trade {trade_record['trade_id']}: "
@@ -373,27 +463,19 @@ def delete_listing(listing_id: str, seller_data: Dict[str, Any]) -> Dict[str, An
         seller_id = seller_data["seller_id"]
 
         # Implement optimistic locking with retries
-        max_retries = 3
+        max_retries = MAX_WRITE_ATTEMPTS
         for attempt in range(max_retries):
             try:
                 # Load current listings with ETag
                 listings, etag = load_from_s3(LISTINGS_KEY)
 
                 # Find the listing
-                target_listing = None
-
-                for listing in listings:
-                    if (
-                        listing["listing_id"] == listing_id
-                        and listing["status"] == "active"
-                    ):
-                        target_listing = listing
-                        break
-
-                if not target_listing:
+                listing_index = find_active_listing(listings, listing_id)
+                if listing_index is None:
                     return create_response(
                         404, {"error": "Listing not found or already removed"}
                     )
+                target_listing = listings[listing_index]
 
                 # Validate ownership - only seller can remove their listing
                 if target_listing["seller_id"] != seller_id:
@@ -405,6 +487,10 @@ def delete_listing(listing_id: str, seller_data: Dict[str, Any]) -> Dict[str, An
                 target_listing["status"] = "removed"
                 target_listing["removed_at"] = datetime.now(timezone.utc).isoformat()
 
+                # Move it (and any other inactive entries) out of the active file
+                ensure_listings_newest_first(listings)
+                listings, archived = split_inactive_listings(listings)
+
                 # Save updated listings with optimistic locking
                 save_to_s3_with_etag(LISTINGS_KEY, listings, etag)
                 break
@@ -415,10 +501,14 @@ def delete_listing(listing_id: str, seller_data: Dict[str, Any]) -> Dict[str, An
                     and attempt < max_retries - 1
                 ):
                     print(f"Concurrent write detected, retrying attempt {attempt + 1}")
+                    backoff(attempt)
                     continue
                 else:
                     raise e
 
+        # Listing removed - archiving failures are not critical
+        archive_listings(archived)
+
         print(
             f"Removed listing {listing_id}: "
             f"{target_listing['item_name']} by {target_listing['seller_name']}"
@@ -449,17 +539,19 @@ def get_trade_history(player_id: str) -> Dict[str, Any]:
         if not player_id:
             return create_response(400, {"error": "Missing player ID"})
 
-        trades = load_from_s3(TRADES_KEY)[0]  # Only data, ignore ETag for reads
-
-        # Filter trades involving this player
-        player_trades = [
+        # The player's own history (stored newest first), followed by their
+        # older trades from the legacy global log (stored oldest first)
+        legacy_read = _s3_executor.submit(
+            load_from_s3, TRADES_KEY, READ_CACHE_TTL_SECONDS
+        )
+        player_trades = load_from_s3(
+            history_key(player_id), max_age=READ_CACHE_TTL_SECONDS
+        )[0]
+        player_trades.extend(
             trade
-            for trade in trades
+            for trade in reversed(legacy_read.result()[0])
             if trade.get("seller_id") == player_id or trade.get("buyer_id") == player_id
-        ]
-
-        # Sort by most recent first
-        player_trades.sort(key=lambda x: x.get("completed_at", ""), reverse=True)
+        )
 
         return create_response(
             200, {"trades": player_trades, "total": len(player_trades)}
@@ -470,45 +562,214 @@ def get_trade_history(player_id: str) -> Dict[str, Any]:
         return create_response(500, {"error": "Failed to fetch trade history"})
 
 
-def load_from_s3(key: str) -> tuple[List[Dict[str, Any]], str]:
-    """Load JSON data from S3 with ETag for optimistic locking"""
+def history_key(player_id: str) -> str:
+    """S3 key of a player's trade history"""
+    return HISTORY_KEY_TEMPLATE.format(player_id=player_id)
+
+
+def new_id() -> str:
+    """Random 22-character URL-safe ID (a base64-encoded UUID4)"""
+    return base64.urlsafe_b64encode(uuid.uuid4().bytes).rstrip(b"=").decode("ascii")
+
+
+def find_active_listing(
+    listings: List[Dict[str, Any]], listing_id: str
+) -> Optional[int]:
+    """Index of the active listing with the given ID, or None"""
+    return next(
+        (
+            i
+            for i, listing in enumerate(listings)
+            if listing["listing_id"] == listing_id and listing["status"] == "active"
+        ),
+        None,
+    )
+
+
+def backoff(attempt: int) -> None:
+    """Sleep a random, exponentially growing delay before retrying a write"""
+    ceiling = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2**attempt)
+    time.sleep(random.uniform(0, ceiling))
+
+
+def split_inactive_listings(
+    listings: List[Dict[str, Any]],
+) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Partition listings into (active, inactive) so the active file stays small"""
+    active = []
+    inactive = []
+    for listing in listings:
+        if listing.get("status") == "active":
+            active.append(listing)
+        else:
+            inactive.append(listing)
+    return active, inactive
+
+
+def archive_listings(listings: List[Dict[str, Any]]) -> None:
+    """Store each sold or removed listing as its own write-once archive object
+
+    Runs after the listings.json write has committed, so failures are logged
+    rather than raised. A listing that is already archived (e.g. by a retried
+    request) is left as it is.
+    """
+    for listing in listings:
+        key = ARCHIVE_KEY_TEMPLATE.format(listing_id=listing["listing_id"])
+        try:
+            s3.put_object(
+                Bucket=BUCKET_NAME,
+                Key=key,
+                Body=encode_json(listing),
+                ContentType="application/json",
+                IfNoneMatch="*",
+            )
+        except Exception as e:
+            if (
+                isinstance(e, ClientError)
+                and e.response["Error"]["Code"] == "PreconditionFailed"
+            ):
+                print(f"Listing already archived: {key}")
+            else:
+                print(f"Warning: Failed to archive listing to {key}: {e}")
+
+
+def prepend_to_s3(key: str, records: List[Dict[str, Any]]) -> bool:
+    """Insert records at the front of a JSON list in S3, retrying on concurrent writes
+
+    Keeps the list newest first. Used for trade histories after the primary
+    write has already succeeded, so failures are logged rather than raised.
+    """
+    if not records:
+        return True
+
+    max_retries = MAX_WRITE_ATTEMPTS
+    for attempt in range(max_retries):
+        try:
+            existing, etag = load_from_s3(key)
+            existing[:0] = records
+            save_to_s3_with_etag(key, existing, etag)
+            return True
+        except Exception as e:
+            # Any error here must not fail a request whose primary write committed
+            if (
+                isinstance(e, ClientError)
+                and e.response["Error"]["Code"] == "PreconditionFailed"
+                and attempt < max_retries - 1
+            ):
+                print(f"Concurrent write to {key}, retrying attempt {attempt + 1}")
+                backoff(attempt)
+                continue
+            print(f"Warning: Failed to add {len(records)} record(s) to {key}: {e}")
+            return False
+    return False
+
+
+def ensure_listings_newest_first(listings: List[Dict[str, Any]]) -> None:
+    """Sort listings newest first in place if they were stored oldest first
+
+    Earlier versions appended new listings to listings.json. Comparing the
+    two ends is O(1), so readers can call this on every request; writers
+    persist the sorted order, which makes it a one-time sort after an upgrade.
+    """
+    if len(listings) < 2:
+        return
+    if listings[0].get("created_at", "") < listings[-1].get("created_at", ""):
+        listings.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+
+
+def load_from_s3(key: str, max_age: float = 0.0) -> tuple[List[Dict[str, Any]], str]:
+    """Load JSON data from S3 with ETag for optimistic locking
+
+    Warm containers keep the last parsed copy of each key and issue a
+    conditional GET, so an unchanged object costs no body transfer or parse.
+    Read-only callers may pass max_age to skip S3 entirely while the cached
+    copy is that fresh; writers keep the default so their ETag is current.
+    """
+    cached = get_cached_s3_object(key)
+    if cached and time.monotonic() - cached[2] < max_age:
+        return copy_records(cached[1]), cached[0]
+
     try:
-        response = s3.get_object(Bucket=BUCKET_NAME, Key=key)
-        content = response["Body"].read().decode("utf-8")
+        get_params = {"Bucket": BUCKET_NAME, "Key": key}
+        if cached and cached[0]:
+            get_params["IfNoneMatch"] = cached[0]
+
+        response = s3.get_object(**get_params)
+        content = response["Body"].read()
         etag = response["ETag"].strip('"')  # Remove quotes from ETag
-        data = json.loads(content)
+        data = decode_json(content)
+        cache_s3_object(key, etag, data)
         print(f"Loaded from S3: {key} (ETag: {etag})")
-        return data, etag
+        return copy_records(data), etag
     except s3.exceptions.NoSuchKey:
         # File doesn't exist yet, return empty list with no ETag
+        cache_s3_object(key, None, [])
         print(f"S3 key {key} not found, returning empty list")
         return [], None
+    except ClientError as e:
+        if cached and e.response["Error"]["Code"] in ("304", "NotModified"):
+            cache_s3_object(key, cached[0], cached[1])
+            print(f"S3 key {key} unchanged, using cached copy (ETag: {cached[0]})")
+            return copy_records(cached[1]), cached[0]
+        print(f"Error loading from S3: {str(e)}")
+        return [], None
     except Exception as e:
         print(f"Error loading from S3: {str(e)}")
         return [], None
 
 
+def cache_s3_object(
+    key: str, etag: Optional[str], records: List[Dict[str, Any]]
+) -> None:
+    """Remember S3 state for a key, evicting the least recently used when full"""
+    with _s3_cache_lock:
+        _s3_cache[key] = (etag, records, time.monotonic())
+        _s3_cache.move_to_end(key)
+        while len(_s3_cache) > S3_CACHE_MAX_ENTRIES:
+            _s3_cache.popitem(last=False)
+
+
+def get_cached_s3_object(
+    key: str,
+) -> Optional[tuple[Optional[str], List[Dict[str, Any]], float]]:
+    """Cached S3 state for a key, marking it most recently used"""
+    with _s3_cache_lock:
+        cached = _s3_cache.get(key)
+        if cached:
+            _s3_cache.move_to_end(key)
+        return cached
+
+
+def copy_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy cached records so callers can mutate them without touching the cache"""
+    return [dict(record) for record in records]
+
+
 def save_to_s3_with_etag(
     key: str, data: List[Dict[str, Any]], expected_etag: str = None
 ) -> None:
     """Save JSON data to S3 with ETag conditional write"""
     try:
-        json_content = json.dumps(data, indent=2, default=str)
+        json_content = encode_json(data)
 
         # Prepare put_object parameters
         put_params = {
             "Bucket": BUCKET_NAME,
             "Key": key,
-            "Body": json_content.encode("utf-8"),
+            "Body": json_content,
             "ContentType": "application/json",
         }
 
-        # Add conditional write if ETag provided
+        # Overwrite only the version we read; without one, only create the
+        # object, so a failed or stale read can never clobber existing data
         if expected_etag:
             put_params["IfMatch"] = expected_etag
+        else:
+            put_params["IfNoneMatch"] = "*"
 
-        s3.put_object(**put_params)
-        print(f"Saved data to S3: {key} (conditional: {expected_etag is not None})")
+        response = s3_conditional.put_object(**put_params)
+        cache_s3_object(key, response["ETag"].strip('"'), copy_records(data))
+        print(f"Saved data to S3: {key} (expected ETag: {expected_etag})")
 
     except ClientError as e:
         if e.response["Error"]["Code"] == "PreconditionFailed":
@@ -519,17 +780,50 @@ def save_to_s3_with_etag(
             raise
 
 
-def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a properly formatted API Gateway response"""
+def create_response(
+    status_code: int,
+    body: Optional[Dict[str, Any]],
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Create a properly formatted API Gateway response (no body when body is None)"""
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": (
+            "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,"
+            "If-None-Match"
+        ),
+        "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
+        "Access-Control-Expose-Headers": "ETag",
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+
     return {
         "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": (
-                "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token"
-            ),
-            "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
-        },
-        "body": json.dumps(body, default=str),
+        "headers": headers,
+        "body": "" if body is None else encode_json(body).decode("utf-8"),
     }
+
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """Look up a request header by case-insensitive name"""
+    name = name.lower()
+    for header, value in (event.get("headers") or {}).items():
+        if header.lower() == name:
+            return value
+    return None
+
+
+def decode_json(content: Union[str, bytes]) -> Any:
+    """Parse JSON, using orjson when it is available"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def encode_json(data: Any) -> bytes:
+    """Serialize JSON compactly to UTF-8, using orjson when it is available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
@@ -51,7 +51,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         domain_name = event.get("requestContext", {}).get("domainName")
         stage = event.get("requestContext", {}).get("stage")
 
-        logger.info(f"Processing route: {route_key} for connection: {connection_id}")
+        # Position updates arrive several times per second per player, so the
+        # per-message trace stays at DEBUG with lazy formatting
+        logger.debug(
+            "Processing route: %s for connection: %s", route_key, connection_id
+        )
 
         # Initialize API Gateway Management client for this request
         global apigateway_management
@@ -256,7 +260,7 @@ def handle_position_update(event: Dict[str, Any], connection_id: str) -> Dict[st
 
         broadcast_to_all_except(position_message, connection_id)
 
-        logger.debug(f"Updated position for {player_id} to ({x}, {y})")
+        logger.debug("Updated position for %s to (%s, %s)", player_id, x, y)
 
         return {"statusCode": 200}
 
@@ -311,9 +315,10 @@ def broadcast_to_all_except(
         response = table.scan()
         connections = response.get("Items", [])
 
-        logger.info(
-            f"Broadcasting to {len(connections)} connections "
-            f"(excluding {exclude_connection_id})"
+        logger.debug(
+            "Broadcasting to %d connections (excluding %s)",
+            len(connections),
+            exclude_connection_id,
         )
 
         stale_connections = []
@@ -176,7 +176,7 @@ func remove_listing(listing_id: String) -> void:
 		return
 
 ## Purchase an item from another player with concurrency protection
-func purchase_item(listing_id: String, _seller_id: String, item_name: String, quantity: int, total_price: int) -> void:
+func purchase_item(listing_id: String, seller_id: String, item_name: String, quantity: int, total_price: int) -> void:
 	print("[TradingMarketplace] Attempting to purchase: %s x%d for %d credits (listing %s)" % [item_name, quantity, total_price, listing_id])
 
 	# PHASE 1.2: Check if a purchase is already in progress
@@ -249,6 +249,7 @@ func purchase_item(listing_id: String, _seller_id: String, item_name: String, qu
 		"buyer_id": local_player_data.get_player_id(),
 		"buyer_name": local_player_data.get_player_name(),
 		"listing_id": listing_id,
+		"seller_id": seller_id,  # Lets the server reject self-purchases early
 		"quantity": quantity,
 		"expected_price": total_price,  # Price validation to prevent race conditions
 		"purchased_at": Time.get_datetime_string_from_system()